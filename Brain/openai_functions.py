@@ -1,7 +1,8 @@
-import os, json
+import os, json, asyncio
 from typing import Tuple, Dict
 from dotenv import load_dotenv
 from openai import OpenAI
+from fastmcp import Client
 
 load_dotenv()
 
@@ -53,14 +54,55 @@ def get_or_create_conv_id(channel: str, thread_ts: str) -> str:
     
     return conv.id
 
+def _tool_result_to_dict(result) -> dict:
+    if getattr(result, "structured_content", None) is not None:
+        return result.structured_content
+    text = "".join(getattr(block, "text", "") for block in result.content)
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return {"result": text}
+
+def call_mcp_tools(calls: list[tuple[str, dict]], timeout: float = 10) -> list[dict]:
+    """
+    Call several MCP tools concurrently over one session, outside of a model turn.
+
+    Args:
+        calls: List of (tool_name, arguments) tuples
+        timeout: Seconds to wait for all the calls, connecting included
+
+    Returns:
+        List of tool results in the same order. A failed call returns {"error": "..."}.
+        Raises TimeoutError if the calls don't finish within `timeout`.
+    """
+    async def _call_all():
+        async with Client(MCP_URL, auth=MCP_KEY, timeout=timeout) as mcp_client:
+            return await asyncio.gather(
+                *(mcp_client.call_tool(name, arguments, timeout=timeout) for name, arguments in calls),
+                return_exceptions=True,
+            )
+
+    if not calls:
+        return []
+    results = asyncio.run(asyncio.wait_for(_call_all(), timeout))
+    return [
+        {"error": str(r)} if isinstance(r, BaseException) else _tool_result_to_dict(r)
+        for r in results
+    ]
+
 MODEL = "gpt-5"
 PROMPT_ID = "pmpt_6913fb3c00888190966cb2b14fc7864c02171c00ec70557c"
 
-def create_openai_response(channel: str, thread_ts: str, input: str, conversation_id: str) -> tuple[str, str]:
+def create_openai_response(channel: str, thread_ts: str, input: str, conversation_id: str, context: Dict[str, str] | None = None) -> tuple[str, str]:
+
+    # Prefetched context (thread, requester profile, CRM matches) saves the model
+    # from calling those tools itself
+    variables = {"slack_channel": channel,"slack_thread_ts": thread_ts,"user_message": input}
+    variables.update(context or {})
 
     resp = client.responses.create(
         model=MODEL,
-        prompt={"id": PROMPT_ID, "variables": {"slack_channel": channel,"slack_thread_ts": thread_ts,"user_message": input}},
+        prompt={"id": PROMPT_ID, "variables": variables},
         input=[{"role": "user", "content": input}],
         conversation=conversation_id,
         tools=[{
@@ -1,12 +1,20 @@
 from slack_bolt import App
-import os, logging, re, dotenv
+import os, logging, re, json, dotenv
+from concurrent.futures import ThreadPoolExecutor
 from slack_bolt.adapter.socket_mode import SocketModeHandler
-from openai_functions import create_openai_response, get_or_create_conv_id
+from openai_functions import create_openai_response, get_or_create_conv_id, call_mcp_tools
 
 dotenv.load_dotenv()
 
 logging.basicConfig(level=logging.INFO)
 
+EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+MAX_PREFETCH_EMAILS = 5
+PREFETCH_TIMEOUT = 10  # seconds to wait for the prefetch before answering without it
+
+# Runs each mention's prefetch alongside the OpenAI conversation setup
+_prefetch_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="prefetch")
+
 
 def _strip_bot_mention(text: str, bot_user_id: str | None) -> str:
     if not text:
@@ -17,6 +25,58 @@ def _strip_bot_mention(text: str, bot_user_id: str | None) -> str:
     # Fallback: strip any mention token
     return re.sub(r"<@[^>]+>", "", text).strip()
 
+def _extract_emails(text: str) -> list[str]:
+    # Slack renders emails as "<mailto:a@b.com|a@b.com>", so de-duplicate
+    emails = []
+    for email in EMAIL_RE.findall(text or ""):
+        email = email.lower()
+        if email not in emails:
+            emails.append(email)
+    return emails[:MAX_PREFETCH_EMAILS]
+
+def _prefetch_context(event: dict) -> dict:
+    """
+    Fetch the context the model usually asks for first: the requester's profile,
+    the Slack thread and Salesforce matches for any emails in the message.
+
+    All of them are MCP tool calls in one batch, so they run concurrently over one
+    session and hit the server's response cache. Returns JSON prompt variables;
+    failed profile/thread calls are left out.
+    """
+    calls = [("requester_profile", "get_slack_user_profile", {"user_id": event.get("user")})]
+    # A mention outside a thread has no earlier messages to fetch
+    if event.get("thread_ts"):
+        calls.append(("slack_thread", "get_slack_thread_messages",
+                      {"channel_id": event.get("channel"), "thread_ts": event["thread_ts"]}))
+    for email in _extract_emails(event.get("text", "")):
+        calls.append((email, "find_salesforce_contact_or_lead", {"email": email}))
+
+    # call_mcp_tools gives up at PREFETCH_TIMEOUT, so this never holds a pool thread much longer
+    results = call_mcp_tools([(tool, args) for _, tool, args in calls], timeout=PREFETCH_TIMEOUT)
+
+    context, crm_matches = {}, {}
+    for (name, tool, _), result in zip(calls, results):
+        if tool == "find_salesforce_contact_or_lead":
+            crm_matches[name] = result  # {"error": "Not found"} is a useful answer here
+        elif "error" not in result:
+            context[name] = json.dumps(result)
+    if crm_matches:
+        context["crm_matches"] = json.dumps(crm_matches)
+    return context
+
+def _start_prefetch(event: dict):
+    """Start the prefetch as soon as the mention arrives. Returns a Future of the prompt variables."""
+    return _prefetch_pool.submit(_prefetch_context, event)
+
+def _collect_prefetch(future, logger) -> dict:
+    """Wait for the prefetch and return its prompt variables, with empty defaults for anything missing."""
+    context = {"slack_thread": "{}", "requester_profile": "{}", "crm_matches": "{}"}
+    try:
+        context.update(future.result(timeout=PREFETCH_TIMEOUT))
+    except Exception:
+        logger.exception("Prefetch failed or timed out")
+    return context
+
 def create_slack_app():
     """
     Create and return a Slack Bolt App that:
@@ -40,9 +100,6 @@ def create_slack_app():
         user = event.get("user")
         ts = event.get("ts")  # timestamp of this message
         thread_ts = event.get("thread_ts") or ts  # root thread id
-        
-        # Map Slack thread → OpenAI conv_ id
-        conv_id = get_or_create_conv_id(channel, thread_ts)
 
         # Clean the text (remove the @mention token)
         raw_text = event.get("text", "")
@@ -51,13 +108,20 @@ def create_slack_app():
             say(text=f"Hi <@{user}> — what can I help with?", thread_ts=thread_ts)
             return
 
+        # Fetch the thread, requester profile and CRM matches while we set up the conversation
+        prefetch = _start_prefetch(event)
+
+        # Map Slack thread → OpenAI conv_ id
+        conv_id = get_or_create_conv_id(channel, thread_ts)
+
         logger.info(f"Incoming mention from {user} in {channel} (thread {thread_ts}): {user_text}")
 
         # --- OpenAI Responses API call ---
         try:
             # Use Slack thread_ts as the conversation id to persist context
             # across replies in the same Slack thread.
-            reply_text = create_openai_response(channel,thread_ts, user_text, conv_id)
+            context = _collect_prefetch(prefetch, logger)
+            reply_text = create_openai_response(channel,thread_ts, user_text, conv_id, context)
 
         except Exception as e:
             logger.exception("OpenAI call failed")
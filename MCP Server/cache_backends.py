@@ -0,0 +1,251 @@
+"""
+Cache/state backends shared by the MCP server and the provider modules.
+
+- MemoryBackend: per-process dicts. Fine for a single worker.
+- SQLiteBackend: one SQLite file shared by every worker on the host, so the
+  Marketo token, Salesforce session and lookup caches are shared too and
+  each upstream login happens once instead of once per worker.
+
+Pick one with MCP_CACHE_BACKEND=memory|sqlite (and MCP_CACHE_PATH for sqlite).
+"""
+
+import os, json, time, sqlite3, threading, fcntl
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SQLITE_PATH = os.path.join(SCRIPT_DIR, "mcp_cache.sqlite3")
+
+
+class CacheBackend(ABC):
+    """
+    Interface for namespaced key/value storage with expiry, LRU limits and tags.
+
+    Values must be JSON-serializable so they can be shared between processes.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def get(self, namespace: str, key: str):
+        """Return (value, stored_at) and mark the entry as recently used, or None if missing/expired."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def set(self, namespace: str, key: str, value, tags=(), expires_in: float | None = None,
+            max_size: int | None = None) -> int:
+        """Store a value. Returns how many least recently used entries were evicted to respect max_size."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, namespace: str, key: str) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def invalidate_tags(self, namespace: str, tags) -> int:
+        """Drop every entry in the namespace carrying any of `tags`. Returns the number dropped."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def size(self, namespace: str) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def lock(self, name: str):
+        """Context manager that holds `name` exclusively across everyone sharing this backend."""
+        raise NotImplementedError
+
+
+class MemoryBackend(CacheBackend):
+    name = "memory"
+
+    def __init__(self):
+        self._namespaces = {}  # namespace -> OrderedDict(key -> (value, stored_at, expires_at, tags))
+        self._lock = threading.Lock()
+        self._named_locks = {}
+
+    def _entries(self, namespace: str) -> OrderedDict:
+        return self._namespaces.setdefault(namespace, OrderedDict())
+
+    def get(self, namespace, key):
+        with self._lock:
+            entries = self._entries(namespace)
+            entry = entries.get(key)
+            if entry is None:
+                return None
+            value, stored_at, expires_at, _ = entry
+            if expires_at is not None and expires_at < time.time():
+                del entries[key]
+                return None
+            entries.move_to_end(key)
+            return value, stored_at
+
+    def set(self, namespace, key, value, tags=(), expires_in=None, max_size=None):
+        now = time.time()
+        expires_at = now + expires_in if expires_in is not None else None
+        evicted = 0
+        with self._lock:
+            entries = self._entries(namespace)
+            entries[key] = (value, now, expires_at, set(tags))
+            entries.move_to_end(key)
+            while max_size is not None and len(entries) > max_size:
+                entries.popitem(last=False)
+                evicted += 1
+        return evicted
+
+    def delete(self, namespace, key):
+        with self._lock:
+            self._entries(namespace).pop(key, None)
+
+    def invalidate_tags(self, namespace, tags):
+        tags = set(tags)
+        with self._lock:
+            entries = self._entries(namespace)
+            stale = [key for key, entry in entries.items() if entry[3] & tags]
+            for key in stale:
+                del entries[key]
+        return len(stale)
+
+    def size(self, namespace):
+        with self._lock:
+            return len(self._entries(namespace))
+
+    @contextmanager
+    def lock(self, name):
+        with self._lock:
+            named_lock = self._named_locks.setdefault(name, threading.Lock())
+        with named_lock:
+            yield
+
+
+class SQLiteBackend(CacheBackend):
+    name = "sqlite"
+
+    def __init__(self, path: str = DEFAULT_SQLITE_PATH):
+        self.path = path
+        self._local = threading.local()
+        # The file holds live API tokens, so only the server's user may read it.
+        # SQLite creates its -wal/-shm files with the same permissions as the database.
+        os.close(os.open(path, os.O_RDWR | os.O_CREAT, 0o600))
+        os.chmod(path, 0o600)
+        with self._connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    tags TEXT NOT NULL,
+                    stored_at REAL NOT NULL,
+                    expires_at REAL,
+                    accessed_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries (namespace, accessed_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections can't be shared between threads, so keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _encode_tags(tags) -> str:
+        # Space-delimited on both ends so a tag can be matched with instr(tags, ' tag ')
+        return " " + " ".join(sorted(set(tags))) + " " if tags else ""
+
+    def get(self, namespace, key):
+        now = time.time()
+        with self._connection() as conn:
+            row = conn.execute(
+                "SELECT value, stored_at, expires_at FROM entries WHERE namespace = ? AND key = ?",
+                (namespace, key),
+            ).fetchone()
+            if row is None:
+                return None
+            value, stored_at, expires_at = row
+            if expires_at is not None and expires_at < now:
+                conn.execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key))
+                return None
+            conn.execute("UPDATE entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                         (now, namespace, key))
+        return json.loads(value), stored_at
+
+    def set(self, namespace, key, value, tags=(), expires_in=None, max_size=None):
+        now = time.time()
+        expires_at = now + expires_in if expires_in is not None else None
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (namespace, key, value, tags, stored_at, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (namespace, key, json.dumps(value, default=str), self._encode_tags(tags), now, expires_at, now),
+            )
+            conn.execute("DELETE FROM entries WHERE namespace = ? AND expires_at < ?", (namespace, now))
+            if max_size is None:
+                return 0
+            cursor = conn.execute(
+                "DELETE FROM entries WHERE namespace = ? AND key IN ("
+                "SELECT key FROM entries WHERE namespace = ? ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (namespace, namespace, max_size),
+            )
+            return cursor.rowcount
+
+    def delete(self, namespace, key):
+        with self._connection() as conn:
+            conn.execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key))
+
+    def invalidate_tags(self, namespace, tags):
+        dropped = 0
+        with self._connection() as conn:
+            for tag in set(tags):
+                cursor = conn.execute(
+                    "DELETE FROM entries WHERE namespace = ? AND instr(tags, ?) > 0",
+                    (namespace, f" {tag} "),
+                )
+                dropped += cursor.rowcount
+        return dropped
+
+    def size(self, namespace):
+        now = time.time()
+        row = self._connection().execute(
+            "SELECT COUNT(*) FROM entries WHERE namespace = ? AND (expires_at IS NULL OR expires_at >= ?)",
+            (namespace, now),
+        ).fetchone()
+        return row[0]
+
+    @contextmanager
+    def lock(self, name):
+        # flock locks are held per open file, so this excludes other threads and other workers alike
+        fd = os.open(f"{self.path}.{name}.lock", os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def get_backend() -> CacheBackend:
+    """Return the process-wide backend chosen by MCP_CACHE_BACKEND, creating it on first use."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                kind = os.environ.get("MCP_CACHE_BACKEND", "memory").lower()
+                if kind == "memory":
+                    _backend = MemoryBackend()
+                elif kind == "sqlite":
+                    _backend = SQLiteBackend(os.environ.get("MCP_CACHE_PATH", DEFAULT_SQLITE_PATH))
+                else:
+                    raise ValueError(f"Unknown MCP_CACHE_BACKEND: {kind!r} (expected 'memory' or 'sqlite')")
+    return _backend
@@ -1,9 +1,13 @@
 import base64
 import mimetypes
 import os
+import tempfile
+import uuid
+from email import policy
 from email.message import EmailMessage
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
+from googleapiclient.http import MediaFileUpload
 
 # Get the directory where this script is located
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -12,13 +16,124 @@ SERVICE_ACCOUNT_FILE = os.path.join(SCRIPT_DIR, 'gmail_auth.json')
 # Define the scopes
 SCOPES = ['https://www.googleapis.com/auth/gmail.send']
 
+# Attachments can only be sent from this directory
+ATTACHMENT_DIR = os.path.realpath(os.environ.get('GMAIL_ATTACHMENT_DIR', os.path.join(SCRIPT_DIR, 'attachments')))
+
+# Messages larger than this are uploaded in chunks with a resumable upload
+RESUMABLE_THRESHOLD = 5 * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 5 * 1024 * 1024  # must be a multiple of 256 KB
+
+# 57 raw bytes encode to exactly one 76-character base64 line
+ENCODE_CHUNK_SIZE = 57 * 1024
+
+_credentials = None
+
+def _get_credentials():
+    """Load the service account credentials once and reuse them for every user."""
+    global _credentials
+    if _credentials is None:
+        _credentials = service_account.Credentials.from_service_account_file(
+            SERVICE_ACCOUNT_FILE, scopes=SCOPES)
+    return _credentials
+
+def warm_up():
+    """Load the service account file ahead of the first tool call."""
+    _get_credentials()
+
 def get_gmail_service(user_email):
-    credentials = service_account.Credentials.from_service_account_file(
-        SERVICE_ACCOUNT_FILE, scopes=SCOPES)
-    delegated_credentials = credentials.with_subject(user_email)
+    delegated_credentials = _get_credentials().with_subject(user_email)
     return build('gmail', 'v1', credentials=delegated_credentials)
 
-def send_email(service, sender, to, cc, subject, message_text, reply_to="", is_html=False):
+def resolve_attachment_path(path):
+    """
+    Resolve an attachment path and make sure it is a file inside ATTACHMENT_DIR.
+
+    Relative paths are resolved against ATTACHMENT_DIR. Raises ValueError otherwise,
+    so callers can't send arbitrary files from the server (e.g. gmail_auth.json).
+    """
+    resolved = os.path.realpath(os.path.join(ATTACHMENT_DIR, path))
+    if os.path.commonpath([resolved, ATTACHMENT_DIR]) != ATTACHMENT_DIR:
+        # Don't reveal the server's directory layout to the caller
+        raise ValueError(f"Attachment must be inside the attachment directory: {path}")
+    if not os.path.isfile(resolved):
+        raise ValueError(f"Attachment not found: {path}")
+    return resolved
+
+def _header_bytes(message):
+    # Serialize only the headers; the body is streamed separately
+    return b''.join(message.policy.fold_binary(name, value) for name, value in message.items()) + b'\r\n'
+
+def _write_attachment(out, path, boundary):
+    content_type, encoding = mimetypes.guess_type(path)
+    if content_type is None or encoding is not None:
+        content_type = 'application/octet-stream'
+
+    part = EmailMessage(policy=policy.SMTP)
+    part['Content-Type'] = content_type
+    part.add_header('Content-Disposition', 'attachment', filename=os.path.basename(path))
+    part['Content-Transfer-Encoding'] = 'base64'
+
+    out.write(f'--{boundary}\r\n'.encode())
+    out.write(_header_bytes(part))
+    with open(path, 'rb') as f:
+        while chunk := f.read(ENCODE_CHUNK_SIZE):
+            out.write(base64.encodebytes(chunk).replace(b'\n', b'\r\n'))
+
+def _write_mime_with_attachments(out, message, attachments):
+    """
+    Write `message` plus its attachments to `out` as a multipart/mixed MIME message.
+
+    Attachments are base64-encoded one chunk at a time, so memory use doesn't
+    grow with their size.
+    """
+    boundary = f'=_{uuid.uuid4().hex}'
+
+    headers = EmailMessage(policy=policy.SMTP)
+    for name, value in message.items():
+        if not name.lower().startswith('content-') and name.lower() != 'mime-version':
+            headers[name] = value
+    headers['MIME-Version'] = '1.0'
+    headers['Content-Type'] = f'multipart/mixed; boundary="{boundary}"'
+    out.write(_header_bytes(headers))
+
+    body = EmailMessage(policy=policy.SMTP)
+    body.set_content(message.get_content(), subtype=message.get_content_subtype())
+    del body['MIME-Version']
+    out.write(f'--{boundary}\r\n'.encode())
+    out.write(body.as_bytes())
+
+    for path in attachments:
+        _write_attachment(out, path, boundary)
+    out.write(f'--{boundary}--\r\n'.encode())
+
+def _send_with_attachments(service, message, attachments):
+    # Build the MIME message in a temp file and upload it from disk through the
+    # media upload endpoint instead of base64-ing it in memory
+    fd, mime_path = tempfile.mkstemp(suffix='.eml')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            _write_mime_with_attachments(out, message, attachments)
+
+        resumable = os.path.getsize(mime_path) > RESUMABLE_THRESHOLD
+        media = MediaFileUpload(mime_path, mimetype='message/rfc822',
+                                chunksize=UPLOAD_CHUNK_SIZE, resumable=resumable)
+        try:
+            return service.users().messages().send(userId='me', body={}, media_body=media).execute()
+        finally:
+            media.stream().close()
+    finally:
+        # Also runs if building the message fails, so no partial copy is left in the temp dir
+        os.remove(mime_path)
+
+def send_email(service, sender, to, cc, subject, message_text, reply_to="", is_html=False, attachments=None):
+    """
+    Send an email, optionally with attachments.
+
+    Args:
+        attachments: Optional list of file paths. Messages with attachments are
+            streamed from disk through the media upload endpoint, using a
+            resumable upload above RESUMABLE_THRESHOLD.
+    """
     # Create the email message
     message = EmailMessage()
     message['From'] = sender
@@ -34,6 +149,9 @@ def send_email(service, sender, to, cc, subject, message_text, reply_to="", is_h
         # Set plain text content
         message.set_content(message_text)
 
+    if attachments:
+        return _send_with_attachments(service, message, attachments)
+
     # Encode the message to base64
     raw_message = base64.urlsafe_b64encode(message.as_bytes()).decode('utf-8')
     body = {'raw': raw_message}
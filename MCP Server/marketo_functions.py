@@ -1,10 +1,10 @@
-import pandas as pd
 import requests
 import json
 import time
 import os
 import dotenv
 from datetime import datetime, timedelta
+from cache_backends import get_backend
 
 dotenv.load_dotenv()
 
@@ -68,13 +68,28 @@ def lookupLead(token, filterType, filterValues, fields=None):
 
 
 # Get an access token and make sure it has more than 60 secs of life
+# The token is kept in the shared cache backend so every worker reuses it instead of logging in again
 def checkTokenLife():
-    remaining = 0
-    while remaining < 60:
-        time.sleep(remaining)  # if the remaining time is less than 60 secs then wait for the token to expire before getting a new one
-        temp = getToken()
-        token = temp[0]
-        remaining = temp[1]
+    backend = get_backend()
+    cached = backend.get("marketo", "token")
+    if cached is not None:
+        return cached[0]
+
+    with backend.lock("marketo_token"):
+        # Another worker may have fetched a token while we waited for the lock
+        cached = backend.get("marketo", "token")
+        if cached is not None:
+            return cached[0]
+
+        remaining = 0
+        while remaining < 60:
+            time.sleep(remaining)  # if the remaining time is less than 60 secs then wait for the token to expire before getting a new one
+            temp = getToken()
+            token = temp[0]
+            remaining = temp[1]
+
+        # Expire our copy 60 secs early so a cached token always has more than 60 secs of life
+        backend.set("marketo", "token", token, expires_in=remaining - 60)
     return token
 
 
@@ -6,22 +6,77 @@ Simple MCP Server that exposes functions from:
 - slack_functions.py
 """
 
+import time
+_STARTUP_BEGAN = time.perf_counter()
+
 from fastmcp import FastMCP
-import sys, os, secrets
+import sys, os, secrets, importlib, threading, logging, functools, inspect, json
+from concurrent.futures import Future
+import anyio
 from starlette.responses import JSONResponse, PlainTextResponse
 from fastmcp.server.auth.auth import AuthProvider, AccessToken
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Add current directory to path so we can import our modules
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-# Import all our function modules
-import gmail_functions
-import marketo_functions
-import salesforce_functions
-import slack_functions
+from cache_backends import get_backend
+
+# ============================================================================
+# Lazy provider loading
+# ============================================================================
+# The function modules are imported on the first call to one of their tools,
+# so a slow import or a missing env var for one provider does not hold up or
+# break the whole server. Set MCP_WARMUP=1 to load them in the background
+# right after startup instead.
+PROVIDERS = ("gmail_functions", "marketo_functions", "salesforce_functions", "slack_functions")
+
+_providers = {}
+_provider_lock = threading.Lock()
+_startup_stats = {
+    "startup_ms": None,
+    "import_ms": {},
+    "warmup_ms": {},
+    "warmup_errors": {},
+}
+
+def _provider(name: str):
+    """Return the provider module, importing it on first use."""
+    module = _providers.get(name)
+    if module is None:
+        with _provider_lock:
+            module = _providers.get(name)
+            if module is None:
+                started = time.perf_counter()
+                module = importlib.import_module(name)
+                _startup_stats["import_ms"][name] = round((time.perf_counter() - started) * 1000, 2)
+                _providers[name] = module
+    return module
+
+def _warm_up_providers():
+    """Import every provider and create its client/session so the first tool calls are fast."""
+    for name in PROVIDERS:
+        started = time.perf_counter()
+        try:
+            module = _provider(name)
+            warm_up = getattr(module, "warm_up", None)
+            if warm_up:
+                warm_up()
+        except Exception as e:
+            logger.exception(f"Warm-up failed for {name}")
+            # Only the exception type: the message can hold env var names or file paths
+            _startup_stats["warmup_errors"][name] = type(e).__name__
+            continue
+        _startup_stats["warmup_ms"][name] = round((time.perf_counter() - started) * 1000, 2)
+
+def start_background_warmup() -> threading.Thread:
+    thread = threading.Thread(target=_warm_up_providers, name="provider-warmup", daemon=True)
+    thread.start()
+    return thread
 
 # ============================================================================
 # Simple Bearer (API key) auth provider
@@ -59,11 +114,189 @@ class StaticApiKeyAuth(AuthProvider):
             )
         return None
 
+# ============================================================================
+# Response cache for read-only tools
+# ============================================================================
+class ToolCache:
+    """
+    TTL + LRU cache for one read-only tool, stored in the shared cache backend.
+
+    - Entries younger than `ttl` seconds are served straight from the cache.
+    - Entries up to `stale_ttl` seconds past that are still served, while a
+      background thread refreshes them (stale-while-revalidate).
+    - Identical calls that arrive while one is already running in this worker
+      wait for that call instead of hitting the upstream API again.
+    - Each entry can carry tags (e.g. "sfdc:<id>") so write tools can
+      invalidate exactly the entries they affect.
+
+    Stats are counted per worker; entries are shared when the backend is.
+    """
+
+    def __init__(self, name: str, ttl: float, stale_ttl: float = 0, max_size: int = 256,
+                 tags=None, cacheable=None):
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_size = max_size
+        self.tags = tags                  # (args, result) -> list of tags
+        self.cacheable = cacheable or (lambda result: True)
+        self._namespace = f"tool:{name}"
+        self._inflight = {}               # key -> Future
+        self._generation = 0              # bumped on invalidation so in-flight results aren't stored
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "deduplicated": 0,
+                      "evictions": 0, "invalidations": 0}
+
+    def get_or_call(self, args: dict, fn):
+        key = json.dumps(args, sort_keys=True, default=str)
+        entry = get_backend().get(self._namespace, key)
+        if entry is not None:
+            result, stored_at = entry
+            with self._lock:
+                if time.time() - stored_at <= self.ttl:
+                    self.stats["hits"] += 1
+                else:
+                    self.stats["stale_hits"] += 1
+                    if key not in self._inflight:
+                        future = self._inflight[key] = Future()
+                        threading.Thread(target=self._fill, args=(key, args, fn, future),
+                                         name=f"refresh-{self.name}", daemon=True).start()
+            return result
+
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                self.stats["misses"] += 1
+                future = self._inflight[key] = Future()
+            else:
+                self.stats["deduplicated"] += 1
+
+        if owner:
+            self._fill(key, args, fn, future)
+        return future.result()
+
+    def _fill(self, key: str, args: dict, fn, future: Future):
+        generation = self._generation
+        started = time.time()
+        try:
+            result = fn(**args)
+        except Exception as e:
+            with self._lock:
+                if self._inflight.get(key) is future:
+                    del self._inflight[key]
+            logger.warning(f"{self.name} call failed, not caching: {e}")
+            future.set_exception(e)
+            return
+
+        if self.cacheable(result):
+            backend = get_backend()
+            tags = self.tags(args, result) if self.tags else ()
+            with self._lock:
+                # Held across the check and the set so a local invalidation can't slip in between
+                if generation == self._generation:
+                    self.stats["evictions"] += backend.set(self._namespace, key, result, tags=tags,
+                                                           expires_in=self.ttl + self.stale_ttl,
+                                                           max_size=self.max_size)
+                    # Another worker may have invalidated this tool while we were fetching; its
+                    # generation counter isn't ours, so compare with the shared invalidation time
+                    invalidated = backend.get("invalidations", self._namespace)
+                    if invalidated is not None and invalidated[0] >= started:
+                        backend.delete(self._namespace, key)
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+        future.set_result(result)
+
+    def invalidate(self, tags) -> int:
+        """Drop every entry carrying any of `tags`. Returns the number of entries dropped."""
+        backend = get_backend()
+        with self._lock:
+            self._generation += 1
+            # Calls already running may have read the old data; let new callers start fresh
+            self._inflight.clear()
+        # Record the time first so fills in other workers that started before it drop their result
+        backend.set("invalidations", self._namespace, time.time())
+        dropped = backend.invalidate_tags(self._namespace, tags)
+        with self._lock:
+            self.stats["invalidations"] += dropped
+        return dropped
+
+    def snapshot(self) -> dict:
+        size = get_backend().size(self._namespace)
+        with self._lock:
+            served = self.stats["hits"] + self.stats["stale_hits"] + self.stats["deduplicated"]
+            total = served + self.stats["misses"]
+            return {
+                **self.stats,
+                "size": size,
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "stale_ttl": self.stale_ttl,
+                "hit_rate": round(served / total, 4) if total else None,
+            }
+
+_caches: dict[str, ToolCache] = {}
+
+def cached(ttl: float, stale_ttl: float = 0, max_size: int = 256, tags=None, cacheable=None):
+    """Cache a read-only tool's responses. Place it below @mcp.tool()."""
+    def decorator(fn):
+        cache = _caches[fn.__name__] = ToolCache(fn.__name__, ttl, stale_ttl, max_size, tags, cacheable)
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return cache.get_or_call(dict(bound.arguments), fn)
+
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
+def invalidate(*tags: str, tools) -> int:
+    """
+    Drop cached responses carrying any of `tags` from the given tools.
+
+    Only those tools' caches discard their in-flight calls, so unrelated
+    lookups keep their de-duplication.
+    """
+    tags = [tag for tag in tags if tag]
+    if not tags:
+        return 0
+    return sum(_caches[tool].invalidate(tags) for tool in tools)
+
+# Tools whose cached responses are tagged with Salesforce record IDs/emails
+SALESFORCE_RECORD_TOOLS = ("find_salesforce_contact_or_lead",)
+
+def _email_tag(email) -> str | None:
+    return f"email:{email.strip().lower()}" if isinstance(email, str) and email.strip() else None
+
+def _sfdc_tag(record_id) -> str | None:
+    # SOQL returns 18-character IDs but users often paste the 15-character form from
+    # Salesforce URLs; the first 15 characters are the same in both
+    return f"sfdc:{record_id.strip()[:15]}" if isinstance(record_id, str) and record_id.strip() else None
+
+def _salesforce_record_tags(args: dict, result: dict) -> list:
+    tags = [_email_tag(args.get("email"))]
+    if isinstance(result, dict):
+        tags.append(_sfdc_tag(result.get("id")))
+    return [tag for tag in tags if tag]
+
+def _found(result) -> bool:
+    # Don't cache "not found": the record may be created outside MCP (form fills, Marketo sync)
+    return isinstance(result, dict) and "error" not in result and result.get("success", True)
+
+def _marketo_succeeded(result) -> bool:
+    # Don't cache auth/rate-limit failures, or "no lead" - form fills create leads at any time
+    return isinstance(result, dict) and result.get("success", False) and bool(result.get("result"))
+
 # Create the MCP server (we’ll attach auth + routes below)
 # NOTE: we pass auth=... to enable Bearer verification on HTTP calls.
+auth = StaticApiKeyAuth(api_key=os.getenv("MCP_API_KEY", ""))
 mcp = FastMCP(
     "RevOps Functions Server",
-    auth=StaticApiKeyAuth(api_key=os.getenv("MCP_API_KEY", "")),
+    auth=auth,
 )
 
 # ============================================================================
@@ -79,15 +312,40 @@ async def health(_request):
     # Lightweight app health (not tool health)
     return JSONResponse({"status": "ok"})
 
+@mcp.custom_route("/stats", methods=["GET"])
+async def stats(request):
+    # Custom routes skip the MCP auth check, so verify the API key here
+    if await auth.verify_token(request.headers.get("Authorization")) is None:
+        return JSONResponse({"error": "Unauthorized"}, status_code=401)
+
+    # Snapshots query the backend (blocking SQLite calls with a busy timeout), so keep them off the event loop
+    cache_stats = await anyio.to_thread.run_sync(
+        lambda: {name: cache.snapshot() for name, cache in _caches.items()})
+
+    return JSONResponse({
+        "worker_pid": os.getpid(),
+        "cache_backend": get_backend().name,
+        "startup": {
+            **_startup_stats,
+            "loaded_providers": sorted(_providers),
+        },
+        "cache": cache_stats,
+    })
+
 # ============================================================================
 # Gmail Functions
 # ============================================================================
 
 @mcp.tool()
-def send_email(user_email: str, sender: str, to: str, subject: str, message_text: str, cc: str = "", reply_to: str = "", is_html: bool = False) -> dict:
-    """Send an email using Gmail API via service account."""
+def send_email(user_email: str, sender: str, to: str, subject: str, message_text: str, cc: str = "", reply_to: str = "", is_html: bool = False, attachment_paths: list[str] = None) -> dict:
+    """Send an email using Gmail API via service account. attachment_paths are files in the server's attachment directory."""
+    gmail_functions = _provider("gmail_functions")
+    try:
+        attachments = [gmail_functions.resolve_attachment_path(path) for path in attachment_paths or []]
+    except ValueError as e:
+        return {"error": str(e)}
     service = gmail_functions.get_gmail_service(user_email)
-    result = gmail_functions.send_email(service, sender, to, cc, subject, message_text, reply_to, is_html)
+    result = gmail_functions.send_email(service, sender, to, cc, subject, message_text, reply_to, is_html, attachments)
     return result
 
 # ============================================================================
@@ -95,8 +353,10 @@ def send_email(user_email: str, sender: str, to: str, subject: str, message_text
 # ============================================================================
 
 @mcp.tool()
+@cached(ttl=300, stale_ttl=600, max_size=500, cacheable=_marketo_succeeded)
 def lookup_marketo_lead(filter_type: str, filter_values: str, fields: str = None) -> dict:
     """Look up a lead in Marketo by email, ID, or other filter type."""
+    marketo_functions = _provider("marketo_functions")
     token = marketo_functions.checkTokenLife()
     result = marketo_functions.lookupLead(token, filter_type, filter_values, fields)
     return result
@@ -104,6 +364,7 @@ def lookup_marketo_lead(filter_type: str, filter_values: str, fields: str = None
 @mcp.tool()
 def get_marketo_activities_for_lead(lead_id: str, days_in_past: int = 7) -> dict:
     """Get activities for a specific Marketo lead ID within a time range."""
+    marketo_functions = _provider("marketo_functions")
     activities = marketo_functions.getActivitiesforLead(lead_id, days_in_past)
     return activities
 
@@ -112,32 +373,41 @@ def get_marketo_activities_for_lead(lead_id: str, days_in_past: int = 7) -> dict
 # ============================================================================
 
 @mcp.tool()
+@cached(ttl=300, stale_ttl=600, max_size=1000, tags=_salesforce_record_tags, cacheable=_found)
 def find_salesforce_contact_or_lead(email: str) -> dict:
     """Find if an email belongs to a Contact or Lead in Salesforce."""
+    salesforce_functions = _provider("salesforce_functions")
     result = salesforce_functions.find_contact_or_lead_by_email(email)
     return result if result else {"error": "Not found"}
 
 @mcp.tool()
 def update_salesforce_lead(lead_id: str, lead_fields: dict) -> dict:
     """Update fields on a Salesforce Lead."""
+    salesforce_functions = _provider("salesforce_functions")
     result = salesforce_functions.update_lead_fields(lead_id, lead_fields)
+    invalidate(_sfdc_tag(lead_id), _email_tag(lead_fields.get("Email")), tools=SALESFORCE_RECORD_TOOLS)
     return result
 
 @mcp.tool()
 def update_salesforce_contact(contact_id: str, contact_fields: dict) -> dict:
     """Update fields on a Salesforce Contact."""
+    salesforce_functions = _provider("salesforce_functions")
     result = salesforce_functions.update_contact_fields(contact_id, contact_fields)
+    invalidate(_sfdc_tag(contact_id), _email_tag(contact_fields.get("Email")), tools=SALESFORCE_RECORD_TOOLS)
     return result
 
 @mcp.tool()
+@cached(ttl=3600, stale_ttl=3600, max_size=200, cacheable=_found)
 def lookup_salesforce_user_by_email(user_email: str) -> dict:
     """Lookup a User by email address and return user information."""
+    salesforce_functions = _provider("salesforce_functions")
     result = salesforce_functions.lookup_user_email(user_email)
     return result
 
 @mcp.tool()
 def create_salesforce_lead(fields: dict) -> dict:
     """Create a new Lead in Salesforce."""
+    salesforce_functions = _provider("salesforce_functions")
     result = salesforce_functions.create_lead(fields)
     return result
 
@@ -146,14 +416,17 @@ def create_salesforce_lead(fields: dict) -> dict:
 # ============================================================================
 
 @mcp.tool()
+@cached(ttl=3600, stale_ttl=3600, max_size=500, cacheable=_found)
 def get_slack_user_profile(user_id: str) -> dict:
     """Get a Slack user's profile information by their Slack user ID."""
+    slack_functions = _provider("slack_functions")
     result = slack_functions.get_slack_user_profile(user_id)
     return result if result else {"error": "User not found"}
 
 @mcp.tool()
 def get_slack_thread_messages(channel_id: str, thread_ts: str) -> dict:
     """Get all messages in a Slack thread by channel ID and thread timestamp."""
+    slack_functions = _provider("slack_functions")
     result = slack_functions.get_thread_messages(channel_id, thread_ts)
     return result
 
@@ -161,6 +434,40 @@ def get_slack_thread_messages(channel_id: str, thread_ts: str) -> dict:
 # Run the server
 # ============================================================================
 
+_startup_stats["startup_ms"] = round((time.perf_counter() - _STARTUP_BEGAN) * 1000, 2)
+
+MCP_PATH = "/api/mcp/"
+
+def _warmup_enabled() -> bool:
+    return os.getenv("MCP_WARMUP", "").lower() in ("1", "true", "yes")
+
+def create_app():
+    """
+    ASGI app factory used by each worker in multi-worker mode.
+
+    Workers don't share MCP sessions, so the HTTP transport runs stateless and
+    any worker can answer any request.
+    """
+    if _warmup_enabled():
+        start_background_warmup()
+    return mcp.http_app(path=MCP_PATH, stateless_http=True)
+
 if __name__ == "__main__":
 
-    mcp.run(transport="http", host="0.0.0.0", port=8000, path="/api/mcp/")
+    logging.basicConfig(level=logging.INFO)
+    logger.info(f"MCP server ready in {_startup_stats['startup_ms']} ms")
+
+    workers = int(os.getenv("MCP_WORKERS", "1"))
+    if workers > 1:
+        import uvicorn
+
+        if get_backend().name == "memory":
+            logger.warning("MCP_WORKERS > 1 with the memory cache backend: each worker keeps its own "
+                           "tokens, sessions and caches. Set MCP_CACHE_BACKEND=sqlite to share them.")
+        uvicorn.run("mcp_server:create_app", factory=True, host="0.0.0.0", port=8000,
+                    workers=workers, app_dir=os.path.dirname(os.path.abspath(__file__)))
+    else:
+        if _warmup_enabled():
+            start_background_warmup()
+
+        mcp.run(transport="http", host="0.0.0.0", port=8000, path=MCP_PATH)
@@ -1,10 +1,20 @@
 from simple_salesforce import Salesforce
-import os, dotenv
+from simple_salesforce.exceptions import SalesforceExpiredSession
+import os, dotenv, functools
 from typing import Dict, Any
+from cache_backends import get_backend
 
 dotenv.load_dotenv()
 
-def sfdc_connection():
+# Reuse one logged-in session instead of logging in on every call. The session is
+# kept in the shared cache backend so every worker uses the same one. Salesforce
+# sessions time out after 2 hours of inactivity by default, so refresh well before.
+SESSION_MAX_AGE = int(os.environ.get("SALESFORCE_SESSION_MAX_AGE", "3600"))
+
+# This worker's client for the shared session, kept so its HTTP connections are reused
+_session = None
+
+def _login():
     username = os.environ["SALESFORCE_USER"]
     password = os.environ["SALESFORCE_PASSWORD"]
     security_token = os.environ["SALESFORCE_TOKEN"]
@@ -16,7 +26,63 @@ def sfdc_connection():
         client_id="Replit",
     )
 
+def sfdc_connection():
+    """Return a Salesforce connection, logging in only when there is no shared session or it is old."""
+    global _session
+    backend = get_backend()
+    cached = backend.get("salesforce", "session")
+    if cached is None:
+        with backend.lock("salesforce_session"):
+            # Another worker may have logged in while we waited for the lock
+            cached = backend.get("salesforce", "session")
+            if cached is None:
+                _session = _login()
+                backend.set("salesforce", "session",
+                            {"session_id": _session.session_id, "instance": _session.sf_instance},
+                            expires_in=SESSION_MAX_AGE)
+                return _session
+
+    session = cached[0]
+    if _session is None or _session.session_id != session["session_id"]:
+        _session = Salesforce(session_id=session["session_id"], instance=session["instance"])
+    return _session
+
+def _drop_session(dead_session_id):
+    """Forget a session Salesforce rejected so the next sfdc_connection() logs in again."""
+    global _session
+    if _session is not None and _session.session_id == dead_session_id:
+        _session = None
+
+    # The shared copy would hand the dead session to every worker (and survive restarts with sqlite)
+    backend = get_backend()
+    with backend.lock("salesforce_session"):
+        cached = backend.get("salesforce", "session")
+        # Another worker may already have replaced it with a fresh session
+        if cached is not None and cached[0]["session_id"] == dead_session_id:
+            backend.delete("salesforce", "session")
+
+def _retry_on_expired_session(fn):
+    """
+    Retry once with a fresh login if Salesforce rejects the reused session (401).
+
+    Sessions can die before SESSION_MAX_AGE: idle timeouts, admin logouts or password resets.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        session_id = sfdc_connection().session_id
+        try:
+            return fn(*args, **kwargs)
+        except SalesforceExpiredSession:
+            _drop_session(session_id)
+            return fn(*args, **kwargs)
+    return wrapper
+
+def warm_up():
+    """Log in to Salesforce ahead of the first tool call."""
+    sfdc_connection()
+
 
+@_retry_on_expired_session
 def find_contact_or_lead_by_email(email):
     """
     Simplified function to find if an email belongs to a Contact or Lead in Salesforce.
@@ -63,6 +129,7 @@ def find_contact_or_lead_by_email(email):
     # Not found in either
     return None
 
+@_retry_on_expired_session
 def update_lead_fields(lead_id: str, lead_fields: Dict[str, Any]) -> dict:
     """
     Update fields on an existing Lead.
@@ -92,6 +159,7 @@ def update_lead_fields(lead_id: str, lead_fields: Dict[str, Any]) -> dict:
             'status_code': result
         }
 
+@_retry_on_expired_session
 def update_contact_fields(contact_id: str, contact_fields: Dict[str, Any]) -> dict:
     """
     Update fields on an existing Contact.
@@ -121,11 +189,13 @@ def update_contact_fields(contact_id: str, contact_fields: Dict[str, Any]) -> di
             'status_code': result
         }
 
+@_retry_on_expired_session
 def create_lead(fields):
     sf = sfdc_connection()
     response = sf.Lead.create(fields)
     return response
 
+@_retry_on_expired_session
 def lookup_user_email(user_email: str) -> dict:
     """
     Lookup a User by email address and return user information.
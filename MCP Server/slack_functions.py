@@ -1,18 +1,32 @@
-import os, dotenv
+import os, dotenv, threading
 from slack_sdk import WebClient
 from slack_sdk.errors import SlackApiError
 
 dotenv.load_dotenv()
 
-# Set your Slack Bot Token (starts with 'xoxb-...')
-slack_token = os.environ["SLACK_BOT_TOKEN"]
+# The Slack client is created on first use so a missing SLACK_BOT_TOKEN only
+# affects the Slack tools instead of breaking the import of this module.
+_client = None
+_client_lock = threading.Lock()
 
-# Initialize the Slack client
-client = WebClient(token=slack_token)
+def get_client() -> WebClient:
+    """Return the shared Slack WebClient, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                # Set your Slack Bot Token (starts with 'xoxb-...')
+                slack_token = os.environ["SLACK_BOT_TOKEN"]
+                _client = WebClient(token=slack_token)
+    return _client
+
+def warm_up():
+    """Create the Slack client ahead of the first tool call."""
+    get_client()
 
 def get_slack_user_profile(user_id):
     """Get Slack user profile by user ID."""
-    response = client.users_info(user=user_id)
+    response = get_client().users_info(user=user_id)
     user = response["user"]
 
     payload = {
@@ -35,7 +49,7 @@ def get_thread_messages(channel_id: str, thread_ts: str):
         Dictionary with success status and list of messages in the thread
     """
 
-    response = client.conversations_replies(
+    response = get_client().conversations_replies(
         channel=channel_id,
         ts=thread_ts
     )